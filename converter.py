@@ -2,8 +2,14 @@
 
 import os
 import re
+import argparse
 import json
+import functools
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, fields, is_dataclass
 from pathlib import Path
+from typing import Optional
 
 try:
     import yaml
@@ -11,32 +17,194 @@ try:
 except ImportError:
     HAS_YAML = False
 
-def extract_balanced(text, start):
+_VERSION_RE = re.compile(r'version\s*=\s*"([^"]+)"', re.ASCII)
+_PROJECT_OPEN_RE = re.compile(r'project\s*\{', re.ASCII)
+_DESCRIPTION_RE = re.compile(r'description\s*=\s*"([^"]+)"', re.ASCII)
+_BUILD_TYPE_REF_RE = re.compile(r'buildType\(([^)]+)\)', re.ASCII)
+_SUB_PROJECT_REF_RE = re.compile(r'subProject\(([^)]+)\)', re.ASCII)
+_VCS_ROOT_REF_RE = re.compile(r'vcsRoot\(([^)]+)\)', re.ASCII)
+_GITHUB_CONNECTION_RE = re.compile(r'githubConnection\s*\{([^}]+)\}', re.ASCII | re.DOTALL)
+_OBJECT_RE = re.compile(r'object\s+(\w+)\s*:\s*(\w+)\(\{')  # Kotlin identifiers may be non-ASCII
+_BRACE_RE = re.compile(r'[{}]', re.ASCII)
+
+# Block openers and blocks
+_STEPS_OPEN_RE = re.compile(r'steps\s*\{', re.ASCII)
+_TRIGGERS_OPEN_RE = re.compile(r'triggers\s*\{', re.ASCII)
+_FEATURES_OPEN_RE = re.compile(r'features\s*\{', re.ASCII)
+_PARAMS_OPEN_RE = re.compile(r'params\s*\{', re.ASCII)
+_VCS_OPEN_RE = re.compile(r'vcs\s*\{', re.ASCII)
+_CONDITIONS_OPEN_RE = re.compile(r'conditions\s*\{', re.ASCII)
+_VCS_TRIGGER_RE = re.compile(r'vcs\s*\{([^}]*)\}', re.ASCII | re.DOTALL)
+_PERFMON_RE = re.compile(r'perfmon\s*\{([^}]*)\}', re.ASCII | re.DOTALL)
+_SCRIPT_OPEN_RE = re.compile(r'script\s*\{', re.ASCII)
+_PYTHON_OPEN_RE = re.compile(r'python\s*\{', re.ASCII)
+_KOTLIN_OPEN_RE = re.compile(r'kotlinScript\s*\{', re.ASCII)
+_POWERSHELL_OPEN_RE = re.compile(r'powerShell\s*\{', re.ASCII)
+_STEP_OPEN_RE = re.compile(r'step\s*\{', re.ASCII)
+_SCRIPT_MODE_OPEN_RE = re.compile(r'scriptMode\s*=\s*script\s*\{', re.ASCII)
+_COMMAND_SCRIPT_OPEN_RE = re.compile(r'command\s*=\s*script\s*\{', re.ASCII)
+
+# Fields
+_NAME_RE = re.compile(r'name\s*=\s*"([^"]+)"', re.ASCII)
+# One alternation per scalar field; the named group doubles as the output key
+_FIELDS_RE = re.compile(
+    r'name\s*=\s*"(?P<name>[^"]+)"'
+    r'|id\s*=\s*"(?P<id>[^"]+)"'
+    r'|type\s*=\s*"(?P<type>[^"]+)"'
+    r'|enabled\s*=\s*(?P<enabled>true|false)'
+    r'|workingDir\s*=\s*"(?P<workingDir>[^"]+)"'
+    r'|executionMode\s*=\s*BuildStep\.ExecutionMode\.(?P<executionMode>\w+)'
+    r'|url\s*=\s*"(?P<url>[^"]+)"'
+    r'|branch\s*=\s*"(?P<branch>[^"]+)"',
+    re.ASCII,
+)
+# Openers only; the closing """ is found with str.find
+_ARTIFACT_RULES_OPEN_RE = re.compile(r'artifactRules\s*=\s*"""', re.ASCII)
+_SCRIPT_CONTENT_OPEN_RE = re.compile(r'scriptContent\s*=\s*"""', re.ASCII)
+_CONTENT_OPEN_RE = re.compile(r'content\s*=\s*"""', re.ASCII)
+_ROOT_RE = re.compile(r'root\(([^)]+)\)', re.ASCII)
+
+# Conditions and params
+_COND_RE = re.compile(r'(equals|contains)\("([^"]+)"\s*,\s*"([^"]+)"\)', re.ASCII)
+# param("key", "value"), select/checkbox/text("key", "default", ...)
+_PARAM_ANY_RE = re.compile(r'(param|select|checkbox|text)\("([^"]+)"\s*,\s*"([^"]+)"', re.ASCII)
+
+# Leaf records are dataclasses with __slots__ (no per-instance dict); _to_dict
+# turns them into plain dicts only when the config is serialized. Fields have no
+# defaults because class-level defaults would clash with the slots.
+@dataclass
+class Param:
+    __slots__ = ('type', 'name', 'value')
+    type: str
+    name: str
+    value: str
+
+@dataclass
+class Condition:
+    __slots__ = ('type', 'property', 'value')
+    type: str
+    property: str
+    value: str
+
+@dataclass
+class Trigger:
+    __slots__ = ('type', 'enabled')
+    type: str
+    enabled: Optional[str]
+
+@dataclass
+class Feature:
+    __slots__ = ('type',)
+    type: str
+
+def _to_dict(value):
+    if isinstance(value, dict):
+        return {k: _to_dict(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_dict(v) for v in value]
+    if is_dataclass(value):
+        # Unset optional fields are left out, as they were as dict keys
+        return {f.name: getattr(value, f.name) for f in fields(value)
+                if getattr(value, f.name) is not None}
+    return value
+
+def find_braces(text):
+    return [m.start() for m in _BRACE_RE.finditer(text)]
+
+def extract_balanced(text, start, braces=None):
+    # Only visit brace offsets; pass a find_braces() index to reuse one scan
+    if braces is None:
+        positions = (m.start() for m in _BRACE_RE.finditer(text, start))
+    else:
+        # Index from the bisect position rather than stepping past earlier offsets
+        positions = (braces[k] for k in range(bisect_left(braces, start), len(braces)))
     level = 0
-    for i, char in enumerate(text[start:], start):
-        if char == '{':
+    for i in positions:
+        if text[i] == '{':
             level += 1
-        elif char == '}':
+        else:
             level -= 1
             if level == 0:
                 return text[start:i+1]
     return ""
 
+def find_block(content, opener):
+    # Body of the first `keyword {...}` block, nested braces included
+    match = opener.search(content)
+    if not match:
+        return None
+    block = extract_balanced(content, match.end() - 1)
+    return block[1:-1] if block else None
+
+def find_triple_quoted(content, opener):
+    # Body of the first `keyword = """..."""` string, or None if unterminated
+    match = opener.search(content)
+    if not match:
+        return None
+    end = content.find('"""', match.end())
+    return content[match.end():end] if end >= 0 else None
+
+def find_refs(content, pattern):
+    return [{'id': m.group(1).strip()} for m in pattern.finditer(content)]
+
+@functools.lru_cache(maxsize=64)
+def _bool_re(key):
+    return re.compile(rf'{re.escape(key)}\s*=\s*(true|false)', re.ASCII)
+
+def parse_bool(content, key):
+    match = _bool_re(key).search(content)
+    return None if not match else match.group(1) == 'true'
+
+def scan_fields(content, keys):
+    # Single pass over content; keeps the first value per key, like re.search
+    found = {}
+    for m in _FIELDS_RE.finditer(content):
+        key = m.lastgroup
+        if key in keys and key not in found:
+            found[key] = m.group(key)
+            if len(found) == len(keys):
+                break
+    if 'enabled' in found:
+        found['enabled'] = found['enabled'] == 'true'
+    return {key: found[key] for key in keys if key in found}
+
+def read_text(file_path):
+    # One sized read and one decode, instead of TextIOWrapper's chunked decoding
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            chunk = os.read(fd, max(size, 1))
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return decode_text(b''.join(chunks))
+
+def decode_text(data):
+    text = data.decode('utf-8')
+    if '\r' in text:
+        # Match text-mode universal newlines
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
 def parse_kotlin_dsl(file_path):
-    with open(file_path, 'r') as f:
-        content = f.read()
+    content = read_text(file_path)
+    braces = find_braces(content)
 
     # Extract version
-    version_match = re.search(r'version\s*=\s*"([^"]+)"', content)
+    version_match = _VERSION_RE.search(content)
     version = version_match.group(1) if version_match else "2.1"
 
     # Extract project block
-    project_match = re.search(r'project\s*\{', content)
+    project_match = _PROJECT_OPEN_RE.search(content)
     if not project_match:
         return None
 
     start = project_match.end() - 1
-    project_block = extract_balanced(content, start)
+    project_block = extract_balanced(content, start, braces)
     if not project_block:
         return None
     project_content = project_block[1:-1]  # remove {}
@@ -48,365 +216,251 @@ def parse_kotlin_dsl(file_path):
     }
 
     # Description
-    desc_match = re.search(r'description\s*=\s*"([^"]+)"', project_content)
+    desc_match = _DESCRIPTION_RE.search(project_content)
     if desc_match:
         project['project']['description'] = desc_match.group(1)
 
     # Build types
-    build_types = re.findall(r'buildType\(([^)]+)\)', project_content)
-    if build_types:
-        project['project']['buildTypes'] = [{'id': bt.strip()} for bt in build_types]
+    if (build_types := find_refs(project_content, _BUILD_TYPE_REF_RE)):
+        project['project']['buildTypes'] = build_types
 
     # Subprojects
-    subprojects = re.findall(r'subProject\(([^)]+)\)', project_content)
-    if subprojects:
-        project['project']['subProjects'] = [{'id': sp.strip()} for sp in subprojects]
+    if (subprojects := find_refs(project_content, _SUB_PROJECT_REF_RE)):
+        project['project']['subProjects'] = subprojects
 
     # VCS roots
-    vcs_roots = re.findall(r'vcsRoot\(([^)]+)\)', project_content)
-    if vcs_roots:
-        project['project']['vcsRoots'] = [{'id': vr.strip()} for vr in vcs_roots]
+    if (vcs_roots := find_refs(project_content, _VCS_ROOT_REF_RE)):
+        project['project']['vcsRoots'] = vcs_roots
 
     # Features
-    features_match = re.search(r'features\s*\{([^}]+)\}', project_content, re.DOTALL)
-    if features_match:
-        features_content = features_match.group(1)
+    features_content = find_block(project_content, _FEATURES_OPEN_RE)
+    if features_content:
         # Simple parsing for githubConnection
-        github_match = re.search(r'githubConnection\s*\{([^}]+)\}', features_content, re.DOTALL)
+        github_match = _GITHUB_CONNECTION_RE.search(features_content)
         if github_match:
-            project['project']['features'] = [{'type': 'githubConnection'}]
+            project['project']['features'] = [Feature('githubConnection')]
 
     # Now parse individual objects
     objects = {}
-    for match in re.finditer(r'object\s+(\w+)\s*:\s*(\w+)\(\{', content):
+    pos = 0
+    # Resume after each object's closing brace instead of searching its body
+    while (match := _OBJECT_RE.search(content, pos)):
         obj_name = match.group(1)
         obj_type = match.group(2)
         start = match.end() - 1
-        obj_content = extract_balanced(content, start)
-        if obj_content:
-            obj_content = obj_content[1:-1]  # remove outer {}
-            if obj_type == 'BuildType':
-                objects[obj_name] = parse_build_type(obj_content)
-            elif obj_type == 'Project':
-                objects[obj_name] = parse_project(obj_content)
-            elif obj_type == 'GitVcsRoot':
-                objects[obj_name] = parse_vcs_root(obj_content)
-            elif obj_type == 'Template':
-                objects[obj_name] = parse_build_type(obj_content)  # Treat as BuildType
-
-    def map_project(proj):
-        if 'buildTypes' in proj:
-            for bt in proj['buildTypes']:
-                if bt['id'] in objects:
-                    obj = objects[bt['id']]
-                    if obj is not None:
-                        bt.update(obj)
-        if 'subProjects' in proj:
-            for sp in proj['subProjects']:
-                if sp['id'] in objects:
-                    obj = objects[sp['id']]
-                    if obj is not None:
-                        sp.update(obj)
-                        map_project(sp)  # recursive for nested
-        if 'vcsRoots' in proj:
-            for vr in proj['vcsRoots']:
-                if vr['id'] in objects:
-                    obj = objects[vr['id']]
-                    if obj is not None:
-                        vr.update(obj)
-
-    map_project(project['project'])
+        obj_content = extract_balanced(content, start, braces)
+        pos = start + len(obj_content) if obj_content else match.end()
+        parser = _OBJECT_PARSERS.get(obj_type)
+        if obj_content and parser:
+            objects[obj_name] = parser(obj_content[1:-1])  # remove outer {}
+
+    # Map objects onto refs with a worklist rather than recursing into subProjects.
+    # Each entry carries its ancestor ids so a cyclic subProject isn't expanded forever.
+    queue = deque([(project['project'], frozenset())])
+    while queue:
+        proj, ancestors = queue.popleft()
+        for bt in proj.get('buildTypes', ()):
+            obj = objects.get(bt['id'])
+            if obj is not None:
+                bt.update(obj)
+        for sp in proj.get('subProjects', ()):
+            obj = objects.get(sp['id'])
+            if obj is not None and sp['id'] not in ancestors:
+                sp.update(obj)
+                queue.append((sp, ancestors | {sp['id']}))
+        for vr in proj.get('vcsRoots', ()):
+            obj = objects.get(vr['id'])
+            if obj is not None:
+                vr.update(obj)
+
     return project
 
 def parse_build_type(content):
     bt = {}
 
     # Name
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
+    name_match = _NAME_RE.search(content)
     if name_match:
         bt['name'] = name_match.group(1)
 
     # Steps
-    steps_match = re.search(r'steps\s*\{', content)
-    if steps_match:
-        start = steps_match.end() - 1
-        steps_block = extract_balanced(content, start)
-        if steps_block:
-            steps_content = steps_block[1:-1]
-            bt['steps'] = parse_steps(steps_content)
+    steps_content = find_block(content, _STEPS_OPEN_RE)
+    if steps_content is not None:
+        bt['steps'] = parse_steps(steps_content)
 
     # Triggers
-    triggers_match = re.search(r'triggers\s*\{([^}]+)\}', content, re.DOTALL)
-    if triggers_match:
-        triggers_content = triggers_match.group(1)
+    triggers_content = find_block(content, _TRIGGERS_OPEN_RE)
+    if triggers_content:
         bt['triggers'] = parse_triggers(triggers_content)
 
     # Features
-    features_match = re.search(r'features\s*\{([^}]+)\}', content, re.DOTALL)
-    if features_match:
-        features_content = features_match.group(1)
+    features_content = find_block(content, _FEATURES_OPEN_RE)
+    if features_content:
         bt['features'] = parse_features(features_content)
 
     # Params
-    params_match = re.search(r'params\s*\{([^}]+)\}', content, re.DOTALL)
-    if params_match:
-        params_content = params_match.group(1)
+    params_content = find_block(content, _PARAMS_OPEN_RE)
+    if params_content:
         bt['params'] = parse_params(params_content)
 
     # VCS
-    vcs_match = re.search(r'vcs\s*\{([^}]+)\}', content, re.DOTALL)
-    if vcs_match:
-        vcs_content = vcs_match.group(1)
+    vcs_content = find_block(content, _VCS_OPEN_RE)
+    if vcs_content:
         bt['vcs'] = parse_vcs(vcs_content)
 
     # Artifact rules
-    artifact_match = re.search(r'artifactRules\s*=\s*"""([^"]+)"""', content, re.DOTALL)
-    if artifact_match:
-        bt['artifactRules'] = artifact_match.group(1).strip()
+    artifact_rules = find_triple_quoted(content, _ARTIFACT_RULES_OPEN_RE)
+    if artifact_rules:
+        bt['artifactRules'] = artifact_rules.strip()
 
     return bt
 
 def parse_steps(content):
     steps = []
-    # Parse script steps
-    for match in re.finditer(r'script\s*\{', content):
-        start = match.end() - 1
-        script_block = extract_balanced(content, start)
-        if script_block:
-            script_content = script_block[1:-1]
-            step = parse_script_step(script_content)
-            steps.append(step)
-    # Parse python steps
-    for match in re.finditer(r'python\s*\{', content):
-        start = match.end() - 1
-        python_block = extract_balanced(content, start)
-        if python_block:
-            python_content = python_block[1:-1]
-            step = parse_python_step(python_content)
-            steps.append(step)
-    # Parse kotlinScript steps
-    for match in re.finditer(r'kotlinScript\s*\{', content):
-        start = match.end() - 1
-        kotlin_block = extract_balanced(content, start)
-        if kotlin_block:
-            kotlin_content = kotlin_block[1:-1]
-            step = parse_kotlin_step(kotlin_content)
-            steps.append(step)
-    # Parse powerShell steps
-    for match in re.finditer(r'powerShell\s*\{', content):
-        start = match.end() - 1
-        powershell_block = extract_balanced(content, start)
-        if powershell_block:
-            powershell_content = powershell_block[1:-1]
-            step = parse_powershell_step(powershell_content)
-            steps.append(step)
-    # Parse general step blocks
-    for match in re.finditer(r'step\s*\{', content):
-        start = match.end() - 1
-        step_block = extract_balanced(content, start)
-        if step_block:
-            step_content = step_block[1:-1]
-            step = parse_general_step(step_content)
-            steps.append(step)
+    for keyword, opener, parse_step in (
+        ('script', _SCRIPT_OPEN_RE, parse_script_step),
+        ('python', _PYTHON_OPEN_RE, parse_python_step),
+        ('kotlinScript', _KOTLIN_OPEN_RE, parse_kotlin_step),
+        ('powerShell', _POWERSHELL_OPEN_RE, parse_powershell_step),
+        ('step', _STEP_OPEN_RE, parse_general_step),
+    ):
+        # Plain substring check skips the regex for step kinds that aren't used
+        if keyword not in content:
+            continue
+        for match in opener.finditer(content):
+            start = match.end() - 1
+            block = extract_balanced(content, start)
+            if block:
+                steps.append(parse_step(block[1:-1]))
     return steps
 
 def parse_script_step(content):
     step = {'type': 'script'}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        step['name'] = name_match.group(1)
-    id_match = re.search(r'id\s*=\s*"([^"]+)"', content)
-    if id_match:
-        step['id'] = id_match.group(1)
-    enabled_match = re.search(r'enabled\s*=\s*(true|false)', content)
-    if enabled_match:
-        step['enabled'] = enabled_match.group(1) == 'true'
-    working_dir_match = re.search(r'workingDir\s*=\s*"([^"]+)"', content)
-    if working_dir_match:
-        step['workingDir'] = working_dir_match.group(1)
-    script_match = re.search(r'scriptContent\s*=\s*"""(.*?)"""', content, re.DOTALL)
-    if script_match:
-        step['scriptContent'] = script_match.group(1).strip()
+    step.update(scan_fields(content, ('name', 'id', 'enabled', 'workingDir')))
+    script = find_triple_quoted(content, _SCRIPT_CONTENT_OPEN_RE)
+    if script is not None:
+        step['scriptContent'] = script.strip()
     # Parse conditions
-    conditions_match = re.search(r'conditions\s*\{([^}]*)\}', content, re.DOTALL)
-    if conditions_match:
-        conditions_content = conditions_match.group(1)
-        conditions = []
-        # Parse equals
-        equals_matches = re.findall(r'equals\("([^"]+)"\s*,\s*"([^"]+)"\)', conditions_content)
-        for prop, val in equals_matches:
-            conditions.append({"type": "equals", "property": prop, "value": val})
-        # Parse contains
-        contains_matches = re.findall(r'contains\("([^"]+)"\s*,\s*"([^"]+)"\)', conditions_content)
-        for prop, val in contains_matches:
-            conditions.append({"type": "contains", "property": prop, "value": val})
+    conditions_content = find_block(content, _CONDITIONS_OPEN_RE)
+    if conditions_content is not None:
+        conditions = parse_conditions(conditions_content)
         if conditions:
             step['conditions'] = conditions
     return step
 
 def parse_python_step(content):
     step = {'type': 'python'}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        step['name'] = name_match.group(1)
-    id_match = re.search(r'id\s*=\s*"([^"]+)"', content)
-    if id_match:
-        step['id'] = id_match.group(1)
-    command_match = re.search(r'command\s*=\s*script\s*\{([^}]+)\}', content, re.DOTALL)
-    if command_match:
-        command_content = command_match.group(1)
-        content_match = re.search(r'content\s*=\s*"""([^"]*)"""', command_content, re.DOTALL)
-        if content_match:
-            step['scriptContent'] = content_match.group(1).strip()
+    step.update(scan_fields(content, ('name', 'id')))
+    command_content = find_block(content, _COMMAND_SCRIPT_OPEN_RE)
+    if command_content is not None:
+        script = find_triple_quoted(command_content, _CONTENT_OPEN_RE)
+        if script is not None:
+            step['scriptContent'] = script.strip()
     return step
 
 def parse_powershell_step(content):
     step = {'type': 'powershell'}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        step['name'] = name_match.group(1)
-    id_match = re.search(r'id\s*=\s*"([^"]+)"', content)
-    if id_match:
-        step['id'] = id_match.group(1)
-    script_mode_match = re.search(r'scriptMode\s*=\s*script\s*\{', content)
-    if script_mode_match:
-        start = script_mode_match.end() - 1
-        script_block = extract_balanced(content, start)
-        if script_block:
-            script_content = script_block[1:-1]
-            content_match = re.search(r'content\s*=\s*"""(.*?)"""', script_content, re.DOTALL)
-            if content_match:
-                step['scriptContent'] = content_match.group(1).strip()
+    step.update(scan_fields(content, ('name', 'id')))
+    script_content = find_block(content, _SCRIPT_MODE_OPEN_RE)
+    if script_content is not None:
+        script = find_triple_quoted(script_content, _CONTENT_OPEN_RE)
+        if script is not None:
+            step['scriptContent'] = script.strip()
     # Parse conditions
-    conditions_match = re.search(r'conditions\s*\{([^}]*)\}', content, re.DOTALL)
-    if conditions_match:
-        conditions_content = conditions_match.group(1)
-        conditions = []
-        contains_matches = re.findall(r'contains\("([^"]+)"\s*,\s*"([^"]+)"\)', conditions_content)
-        for prop, val in contains_matches:
-            conditions.append({"type": "contains", "property": prop, "value": val})
+    conditions_content = find_block(content, _CONDITIONS_OPEN_RE)
+    if conditions_content is not None:
+        conditions = parse_conditions(conditions_content)
         if conditions:
             step['conditions'] = conditions
     return step
 
 def parse_general_step(content):
-    step = {}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        step['name'] = name_match.group(1)
-    id_match = re.search(r'id\s*=\s*"([^"]+)"', content)
-    if id_match:
-        step['id'] = id_match.group(1)
-    type_match = re.search(r'type\s*=\s*"([^"]+)"', content)
-    if type_match:
-        step['type'] = type_match.group(1)
-    enabled_match = re.search(r'enabled\s*=\s*(true|false)', content)
-    if enabled_match:
-        step['enabled'] = enabled_match.group(1) == 'true'
-    execution_mode_match = re.search(r'executionMode\s*=\s*BuildStep\.ExecutionMode\.(\w+)', content)
-    if execution_mode_match:
-        step['executionMode'] = execution_mode_match.group(1)
+    step = scan_fields(content, ('name', 'id', 'type', 'enabled', 'executionMode'))
     # Parse params in step
-    params_match = re.search(r'params\s*\{([^}]*)\}', content, re.DOTALL)
-    if params_match:
-        params_content = params_match.group(1)
+    params_content = find_block(content, _PARAMS_OPEN_RE)
+    if params_content is not None:
         step['params'] = parse_params(params_content)
     return step
 
 def parse_kotlin_step(content):
     step = {'type': 'kotlinScript'}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        step['name'] = name_match.group(1)
-    id_match = re.search(r'id\s*=\s*"([^"]+)"', content)
-    if id_match:
-        step['id'] = id_match.group(1)
-    enabled_match = re.search(r'enabled\s*=\s*(true|false)', content)
-    if enabled_match:
-        step['enabled'] = enabled_match.group(1) == 'true'
-    content_match = re.search(r'content\s*=\s*"""([^"]*)"""', content, re.DOTALL)
-    if content_match:
-        step['content'] = content_match.group(1).strip()
+    step.update(scan_fields(content, ('name', 'id', 'enabled')))
+    script = find_triple_quoted(content, _CONTENT_OPEN_RE)
+    if script is not None:
+        step['content'] = script.strip()
     return step
 
 def parse_triggers(content):
     triggers = []
-    vcs_matches = re.findall(r'vcs\s*\{([^}]*)\}', content, re.DOTALL)
+    if 'vcs' not in content:
+        return triggers
+    vcs_matches = _VCS_TRIGGER_RE.findall(content)
     for vcs_content in vcs_matches:
-        trigger = {'type': 'vcs'}
-        enabled_match = re.search(r'enabled\s*=\s*(true|false)', vcs_content)
-        if enabled_match:
-            trigger['enabled'] = str(enabled_match.group(1) == 'true').lower()
+        trigger = Trigger('vcs', None)
+        enabled = parse_bool(vcs_content, 'enabled')
+        if enabled is not None:
+            trigger.enabled = str(enabled).lower()
         triggers.append(trigger)
     return triggers
 
 def parse_features(content):
     features = []
-    perfmon_matches = re.findall(r'perfmon\s*\{([^}]*)\}', content, re.DOTALL)
+    if 'perfmon' not in content:
+        return features
+    perfmon_matches = _PERFMON_RE.findall(content)
     for _ in perfmon_matches:
-        features.append({'type': 'perfmon'})
+        features.append(Feature('perfmon'))
     return features
 
+def parse_conditions(content):
+    # equals(...) and contains(...) in one pass, in declaration order
+    return [Condition(m.group(1), m.group(2), m.group(3))
+            for m in _COND_RE.finditer(content)]
+
 def parse_params(content):
-    params = []
-    # Parse param("key", "value")
-    param_matches = re.findall(r'param\("([^"]+)"\s*,\s*"([^"]+)"', content)
-    for key, value in param_matches:
-        params.append({"type": "param", "name": key, "value": value})
-    # Parse select("key", "default", ...)
-    select_matches = re.findall(r'select\("([^"]+)"\s*,\s*"([^"]+)"', content)
-    for key, default in select_matches:
-        params.append({"type": "select", "name": key, "value": default})
-    # Parse checkbox("key", "value", ...)
-    checkbox_matches = re.findall(r'checkbox\("([^"]+)"\s*,\s*"([^"]+)"', content)
-    for key, value in checkbox_matches:
-        params.append({"type": "checkbox", "name": key, "value": value})
-    # Parse text("key", "default", ...)
-    text_matches = re.findall(r'text\("([^"]+)"\s*,\s*"([^"]+)"', content)
-    for key, default in text_matches:
-        params.append({"type": "text", "name": key, "value": default})
-    return params
+    # Single pass, so params come out in declaration order
+    return [Param(m.group(1), m.group(2), m.group(3))
+            for m in _PARAM_ANY_RE.finditer(content)]
 
 def parse_vcs(content):
     vcs = {}
-    root_match = re.search(r'root\(([^)]+)\)', content)
+    root_match = _ROOT_RE.search(content)
     if root_match:
         vcs['root'] = root_match.group(1).strip()
     return vcs
 
 def parse_project(content):
     proj = {}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
+    name_match = _NAME_RE.search(content)
     if name_match:
         proj['name'] = name_match.group(1)
     # Add buildTypes
-    build_types = re.findall(r'buildType\(([^)]+)\)', content)
-    if build_types:
-        proj['buildTypes'] = [{'id': bt.strip()} for bt in build_types]
+    if (build_types := find_refs(content, _BUILD_TYPE_REF_RE)):
+        proj['buildTypes'] = build_types
     # Add subProjects
-    sub_projects = re.findall(r'subProject\(([^)]+)\)', content)
-    if sub_projects:
-        proj['subProjects'] = [{'id': sp.strip()} for sp in sub_projects]
+    if (sub_projects := find_refs(content, _SUB_PROJECT_REF_RE)):
+        proj['subProjects'] = sub_projects
     # Add vcsRoots
-    vcs_roots = re.findall(r'vcsRoot\(([^)]+)\)', content)
-    if vcs_roots:
-        proj['vcsRoots'] = [{'id': vr.strip()} for vr in vcs_roots]
+    if (vcs_roots := find_refs(content, _VCS_ROOT_REF_RE)):
+        proj['vcsRoots'] = vcs_roots
     return proj
 
 def parse_vcs_root(content):
-    vcs = {}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        vcs['name'] = name_match.group(1)
-    url_match = re.search(r'url\s*=\s*"([^"]+)"', content)
-    if url_match:
-        vcs['url'] = url_match.group(1)
-    branch_match = re.search(r'branch\s*=\s*"([^"]+)"', content)
-    if branch_match:
-        vcs['branch'] = branch_match.group(1)
-    return vcs
+    return scan_fields(content, ('name', 'url', 'branch'))
+
+_OBJECT_PARSERS = {
+    'BuildType': parse_build_type,
+    'Project': parse_project,
+    'GitVcsRoot': parse_vcs_root,
+    'Template': parse_build_type,  # Treat as BuildType
+}
 
 def main():
+    parser = argparse.ArgumentParser(description="Convert TeamCity Kotlin DSL settings to YAML/JSON")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="don't print the converted structure")
+    args = parser.parse_args()
+
     teamcity_dir = Path('example-repo/.teamcity')
     settings_file = teamcity_dir / 'settings.kts'
 
@@ -416,19 +470,25 @@ def main():
 
     config = parse_kotlin_dsl(settings_file)
     if config:
-        try:
-            import yaml
+        config = _to_dict(config)
+        # Serialized once, reused for the output file and the printout
+        if HAS_YAML:
+            # libyaml's C emitter when available
+            dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+            output = yaml.dump(config, Dumper=dumper, default_flow_style=False)
             output_file = 'teamcity.yaml'
-            with open(output_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(output)
             print("Converted to teamcity.yaml")
-        except ImportError:
+        else:
+            output = json.dumps(config, indent=2)
             output_file = 'teamcity.json'
-            with open(output_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(output)
             print("Converted to teamcity.json (install PyYAML for YAML output)")
-        print("Output structure:")
-        print(json.dumps(config, indent=2))
+        if not args.quiet:
+            print("Output structure:")
+            print(output, end='')
     else:
         print("Failed to parse")
 